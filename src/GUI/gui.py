@@ -2,9 +2,15 @@ import tkinter as tk
 from tkinter import ttk
 import sys
 import json
+import io
+import queue
+import threading
+import contextlib
+import numpy as np
 
 sys.path.append( '..' )
 from src.backend import backend
+from src.GUI import mmr_chart
 
 class CapturePrints:
     def __init__(self):
@@ -35,6 +41,11 @@ class GUI:
         self.tab2 = ttk.Frame(self.notebook)
         self.notebook.add(self.tab2, text="最近20把深度分析")
         self.create_second_tab(self.tab2)        
+
+        # 第三个标签页
+        self.tab3 = ttk.Frame(self.notebook)
+        self.notebook.add(self.tab3, text="MMR曲线")
+        self.create_third_tab(self.tab3)
         
         
     def create_first_tab(self, master):
@@ -78,6 +89,20 @@ class GUI:
         self.logged_player_name_var = tk.StringVar(master)
         self.combo_logged_player_name = ttk.Combobox(master, textvariable=self.logged_player_name_var, values=list(self.logged_player_name_values.keys()))
         self.combo_logged_player_name.grid(row=3, column=1, sticky='w', padx=10, pady=10)
+        self.combo_logged_player_name.bind("<<ComboboxSelected>>", self.on_logged_player_selected)
+
+        # summaries are read once here. every backend call (submit and summary refresh)
+        # runs in one worker thread and reports back through the queue, the tk thread never waits
+        self.player_summaries = backend.get_player_summaries()
+        self.backend_result_queue = queue.Queue()
+        # only the latest submit and the latest stale pick wait, older ones are superseded
+        self.pending_submit = None
+        self.pending_summary_refresh = None
+        self.backend_job_condition = threading.Condition()
+        # bumped by every submit, summaries and reports of an older one are not shown
+        self.submit_generation = 0
+        threading.Thread(target=self.backend_worker, daemon=True).start()
+        master.after(200, self.poll_backend_results)
 
 
         self.label_limit_param = tk.Label(master, text="抽取多少把比赛？")
@@ -100,6 +125,19 @@ class GUI:
         self.dropdown_menu = ttk.Combobox(master, textvariable=self.dropdown_var, values=list(self.dropdown_values.keys()))
         self.dropdown_menu.grid(row=5, column=1, sticky='w', padx=10, pady=10)  # pady doubled
 
+        self.current_patch_only_var = tk.BooleanVar(master, value=False)
+        self.check_current_patch_only = tk.Checkbutton(master, text="仅当前版本", variable=self.current_patch_only_var)
+        self.check_current_patch_only.grid(row=6, column=0, sticky='w', padx=10, pady=20)
+
+        self.with_interval_var = tk.BooleanVar(master, value=False)
+        self.check_with_interval = tk.Checkbutton(master, text="显示置信区间", variable=self.with_interval_var)
+        self.check_with_interval.grid(row=7, column=0, sticky='w', padx=10, pady=0)
+
+        # race OpenDota against Stratz instead of the local match cache
+        self.hedged_var = tk.BooleanVar(master, value=False)
+        self.check_hedged = tk.Checkbutton(master, text="OpenDota慢时改用Stratz", variable=self.hedged_var)
+        self.check_hedged.grid(row=7, column=1, sticky='w', padx=10, pady=0)
+
         self.submit_button = tk.Button(master, text="一键政审！", command=self.submit)
         self.submit_button.grid(row=6, column=1, sticky='w', padx=10, pady=20)  # Increased pady for more spacing
 
@@ -116,11 +154,18 @@ class GUI:
         
     def create_second_tab(self, master):
         pass              
+
+    def create_third_tab(self, master):
+        self.mmr_chart = mmr_chart.MMRChart(master)
+        self.mmr_chart_key = None
         
     
     def submit(self):
         limit_param = self.entry_limit_param.get()
         lobby_type_param = self.dropdown_values[self.dropdown_var.get()]      
+        current_patch_only_param = self.current_patch_only_var.get()
+        with_interval_param = self.with_interval_var.get()
+        source_param = "hedged" if self.hedged_var.get() else "opendota"
         
         choice = self.choice_var.get()
         if choice == "dropdown":
@@ -131,28 +176,141 @@ class GUI:
             accout_ID_param = self.entry_accout_ID_param.get()        
             
           
-        capture_prints = CapturePrints()
-        original_stdout = sys.stdout  # 保存原始stdout
-        sys.stdout = capture_prints   # 重定向print输出
+        self.submit_generation += 1
+        submit_job = (
+            self.submit_generation,
+            (player_name_param, accout_ID_param, limit_param, lobby_type_param, current_patch_only_param, with_interval_param, source_param),
+        )
+        with self.backend_job_condition:
+            self.pending_submit = submit_job
+            # the user now wants the report, not the summary
+            self.pending_summary_refresh = None
+            self.backend_job_condition.notify()
 
-        # 调用后端逻辑
-        self.call_backend_logic(player_name_param, accout_ID_param, limit_param, lobby_type_param)
+        self.result_text.delete(1.0, tk.END)
+        self.result_text.insert(tk.END, f"正在政审{player_name_param}，请稍候……")
 
-        sys.stdout = original_stdout  # 恢复原始stdout
+    def run_submit(self, backend_params):
+        """runs in the worker thread, the report text and the match data of one submit."""
+        capture_prints = CapturePrints()
+        # only the worker redirects stdout, the tk thread does not print
+        with contextlib.redirect_stdout(capture_prints):
+            try:
+                # 调用后端逻辑
+                match_data = self.call_backend_logic(*backend_params)
+            except Exception as error:  # network or data problem, show it instead of the report
+                return f"政审失败：{error}", None
 
         output = capture_prints.get_contents()
         
-        # delete the first 4 line
+        # delete the fetch log, it ends with the "Data saved to" line
         lines = output.split('\n')
-        del lines[0:4]
+        saved_line = next((i for i, line in enumerate(lines) if line.startswith("Data saved to")), -1)
+        del lines[0:saved_line + 1]
         output = '\n'.join(lines)
         
         print(output)
+        return output, match_data
+
+    def show_submit_result(self, backend_params, output, match_data):
+        player_name_param, _, limit_param, lobby_type_param, current_patch_only_param = backend_params[:5]
+        if match_data:
+            chart_key = (player_name_param, lobby_type_param, limit_param, current_patch_only_param)
+            self.update_mmr_chart(chart_key, player_name_param, match_data)
 
         # 在Text小部件中显示捕获的输出
         self.result_text.delete(1.0, tk.END)  # 清空Text小部件内容
         self.result_text.insert(tk.END, output)  # 插入新文本
         
+    def on_logged_player_selected(self, event=None):
+        """show the cached summary right away, refresh it in the background only if it is stale."""
+        player_name = self.logged_player_name_var.get()
+        summary = self.player_summaries.get(player_name)
+        self.show_player_summary(player_name, summary)
+        if backend.is_player_summary_stale(summary):
+            with self.backend_job_condition:
+                self.pending_summary_refresh = (self.submit_generation, player_name)
+                self.backend_job_condition.notify()
+
+    def show_player_summary(self, player_name, summary):
+        if summary is None:
+            text = f"{player_name}还没有缓存的概要，正在后台同步……"
+        else:
+            text = backend.format_player_summary(player_name, summary)
+            if backend.is_player_summary_stale(summary):
+                text += "\n\n概要有些旧了，正在后台同步……"
+        self.result_text.delete(1.0, tk.END)
+        self.result_text.insert(tk.END, text)
+
+    def backend_worker(self):
+        """runs in the worker thread for the whole session, no tk call in here.
+        a waiting submit goes before a waiting summary refresh.
+        """
+        while True:
+            with self.backend_job_condition:
+                while self.pending_submit is None and self.pending_summary_refresh is None:
+                    self.backend_job_condition.wait()
+                submit_job = self.pending_submit
+                refresh_job = None if submit_job is not None else self.pending_summary_refresh
+                if submit_job is not None:
+                    self.pending_submit = None
+                else:
+                    self.pending_summary_refresh = None
+            if submit_job is not None:
+                generation, backend_params = submit_job
+                output, match_data = self.run_submit(backend_params)
+                self.backend_result_queue.put(("report", generation, (backend_params, output, match_data)))
+            else:
+                generation, player_name = refresh_job
+                self.backend_result_queue.put(("summary", generation, (player_name, self.refresh_player_summary(player_name))))
+
+    def refresh_player_summary(self, player_name):
+        """sync the player unless an earlier refresh or a submit already did, None on failure."""
+        summary = self.player_summaries.get(player_name)
+        if not backend.is_player_summary_stale(summary):
+            return summary
+        # the fetch log is not shown anywhere
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                return backend.sync_player_matches(player_name)
+            except Exception:  # network or data problem, keep the old summary
+                return None
+
+    def poll_backend_results(self):
+        while True:
+            try:
+                kind, generation, result = self.backend_result_queue.get_nowait()
+            except queue.Empty:
+                break
+            # a submit made after this job owns the result box now
+            if generation != self.submit_generation:
+                continue
+            if kind == "report":
+                self.show_submit_result(*result)
+                continue
+            player_name, summary = result
+            if summary is not None and self.choice_var.get() == "dropdown" and self.logged_player_name_var.get() == player_name:
+                self.show_player_summary(player_name, summary)
+        self.master.after(200, self.poll_backend_results)
+
+    def update_mmr_chart(self, chart_key, player_name, match_data):
+        """same player, match type, limit and patch filter: only append the matches
+        newer than the chart. otherwise, or when the data reaches further back
+        than the chart, draw the whole history again.
+        """
+        timestamps, steps = backend.calculate_mmr_steps(match_data)
+        first_timestamp = self.mmr_chart.first_timestamp()
+        last_timestamp = self.mmr_chart.last_timestamp()
+        if chart_key != self.mmr_chart_key or last_timestamp is None or timestamps[0] < first_timestamp:
+            # the newest match ends at the default mmr, like calculate_mmr_history_roughly
+            mmrs = backend.DEFAULT_MMR - steps.sum() + np.cumsum(steps)
+            self.mmr_chart.set_points(player_name, timestamps, mmrs)
+            self.mmr_chart_key = chart_key
+        else:
+            new_match = timestamps > last_timestamp
+            mmrs = self.mmr_chart.last_mmr() + np.cumsum(steps[new_match])
+            self.mmr_chart.append_points(timestamps[new_match], mmrs)
+
     def toggle_input_method(self):
         choice = self.choice_var.get()
         if choice == "dropdown":
@@ -166,7 +324,7 @@ class GUI:
         
         
         
-    def call_backend_logic(self, player_name_param, accout_ID_param, limit_param, lobby_type_param):
+    def call_backend_logic(self, player_name_param, accout_ID_param, limit_param, lobby_type_param, current_patch_only_param=False, with_interval_param=False, source_param="opendota"):
         """call the back end function.
 
         Args:
@@ -174,11 +332,14 @@ class GUI:
             accout_ID_param (_type_): _description_
             limit_param (_type_): _description_
             lobby_type_param (_type_): _description_
+            current_patch_only_param (bool): only analyze the current patch.
+            with_interval_param (bool): show bootstrap confidence intervals.
+            source_param (str): "opendota" for the local match cache, "hedged" to race OpenDota and Stratz.
 
         Returns:
-            _type_: _description_
+            list: the analyzed match data.
         """
-        result_text=backend.analyze_custom_input(player_name_param,accout_ID_param,limit_param,lobby_type_param)
+        result_text=backend.analyze_custom_input(player_name_param,accout_ID_param,limit_param,lobby_type_param,current_patch_only_param,with_interval_param,source_param)
         return result_text
 
 if __name__ == "__main__":
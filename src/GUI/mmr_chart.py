@@ -0,0 +1,125 @@
+import tkinter as tk
+
+import numpy as np
+from matplotlib.figure import Figure
+import matplotlib.dates as mdates
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+
+# seconds in a day, matplotlib dates are days since 1970-01-01
+SECONDS_PER_DAY = 86400.0
+
+# extra room around the data so new points usually land inside the current view
+# and only need a blit, not a full redraw
+X_HEADROOM_DAYS = 7
+Y_HEADROOM_MMR = 100
+
+
+class MMRChart:
+    """MMR over time embedded in a tk frame.
+
+    the line is an animated artist: a full draw caches everything else as the
+    background, appending points only restores that background, redraws the line
+    and blits. the figure is only rebuilt when the new points leave the view.
+    """
+
+    def __init__(self, master):
+        self.master = master
+        self.player_name = None
+
+        self.figure = Figure(figsize=(6, 4), dpi=100)
+        self.axes = self.figure.add_subplot()
+        # no markers, path simplification keeps pan / zoom smooth on long histories
+        (self.line,) = self.axes.plot([], [], linestyle='-', linewidth=1, animated=True)
+        self.axes.xaxis_date()
+        self.axes.xaxis.set_major_locator(mdates.AutoDateLocator())
+        self.axes.xaxis.set_major_formatter(mdates.DateFormatter('%Y/%m/%d'))
+        self.axes.set_ylabel('MMR')
+        self.axes.grid(True)
+
+        self.canvas = FigureCanvasTkAgg(self.figure, master)
+        self.toolbar = NavigationToolbar2Tk(self.canvas, master, pack_toolbar=False)
+        self.toolbar.update()
+        self.toolbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.canvas.get_tk_widget().pack(side=tk.TOP, expand=True, fill="both")
+
+        # grow by doubling, the line always shows a view of the first size points
+        self.dates = np.empty(1024)
+        self.mmrs = np.empty(1024)
+        self.size = 0
+
+        self.background = None
+        self.canvas.mpl_connect("draw_event", self.on_draw)
+
+    def on_draw(self, event):
+        """every full draw (resize, pan, zoom, rescale) re-caches the background."""
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.axes.draw_artist(self.line)
+
+    def first_timestamp(self):
+        """start_time of the oldest point, None if the chart is empty."""
+        if self.size == 0:
+            return None
+        return int(round(self.dates[0] * SECONDS_PER_DAY))
+
+    def last_timestamp(self):
+        """start_time of the newest point, None if the chart is empty."""
+        if self.size == 0:
+            return None
+        return int(round(self.dates[self.size - 1] * SECONDS_PER_DAY))
+
+    def last_mmr(self):
+        """mmr of the newest point, None if the chart is empty."""
+        if self.size == 0:
+            return None
+        return self.mmrs[self.size - 1]
+
+    def set_points(self, player_name, timestamps, mmrs):
+        """replace everything on the chart, always a full redraw."""
+        self.player_name = player_name
+        self.size = 0
+        self.axes.set_title(f'{player_name} MMR Over Time')
+        self._extend(timestamps, mmrs)
+        self._rescale()
+
+    def append_points(self, timestamps, mmrs):
+        """add new points at the end. blit if they fit in the view, redraw otherwise."""
+        if len(timestamps) == 0:
+            return
+        self._extend(timestamps, mmrs)
+        new_dates = np.asarray(timestamps, dtype=float) / SECONDS_PER_DAY
+        x_low, x_high = self.axes.get_xlim()
+        y_low, y_high = self.axes.get_ylim()
+        inside = (
+            new_dates.min() >= x_low and new_dates.max() <= x_high
+            and np.min(mmrs) >= y_low and np.max(mmrs) <= y_high
+        )
+        if inside and self.background is not None:
+            self._blit()
+        else:
+            self._rescale()
+
+    def _extend(self, timestamps, mmrs):
+        new_size = self.size + len(timestamps)
+        if new_size > len(self.dates):
+            capacity = max(new_size, 2 * len(self.dates))
+            self.dates = np.concatenate([self.dates[:self.size], np.empty(capacity - self.size)])
+            self.mmrs = np.concatenate([self.mmrs[:self.size], np.empty(capacity - self.size)])
+        self.dates[self.size:new_size] = np.asarray(timestamps, dtype=float) / SECONDS_PER_DAY
+        self.mmrs[self.size:new_size] = mmrs
+        self.size = new_size
+        self.line.set_data(self.dates[:self.size], self.mmrs[:self.size])
+
+    def _rescale(self):
+        if self.size != 0:
+            dates = self.dates[:self.size]
+            mmrs = self.mmrs[:self.size]
+            self.axes.set_xlim(dates.min() - X_HEADROOM_DAYS, dates.max() + X_HEADROOM_DAYS)
+            self.axes.set_ylim(mmrs.min() - Y_HEADROOM_MMR, mmrs.max() + Y_HEADROOM_MMR)
+        # on_draw caches the new background
+        self.canvas.draw_idle()
+
+    def _blit(self):
+        self.canvas.restore_region(self.background)
+        self.axes.draw_artist(self.line)
+        self.canvas.blit(self.figure.bbox)
+        self.canvas.flush_events()
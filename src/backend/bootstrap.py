@@ -0,0 +1,109 @@
+from collections import namedtuple
+
+import numpy as np
+
+# bootstrap confidence interval of win rates.
+# all resamples are drawn at once as one array, no python loop per resample.
+
+# the 赠品马 / 下等马 / 中等马 / 上等马 / 特等马 boundaries of the report, in percent
+WIN_RATE_VERDICT_THRESHOLDS = (46, 48, 52, 54)
+
+DEFAULT_RESAMPLE_COUNT = 2000
+DEFAULT_CONFIDENCE = 0.95
+
+# cap of one resample array, so 10k matches x 2000 resamples stays small
+MAX_MATRIX_ELEMENTS = 2_000_000
+
+WinRateInterval = namedtuple("WinRateInterval", ["low", "high"])
+
+
+def _percentile_bounds(confidence):
+    return [(1 - confidence) / 2 * 100, (1 + confidence) / 2 * 100]
+
+
+def bootstrap_win_rate_interval(is_victory, resample_count=DEFAULT_RESAMPLE_COUNT, confidence=DEFAULT_CONFIDENCE, rng=None):
+    """percentile bootstrap interval of one win rate.
+
+    draws a (resample_count, match_count) resample-index matrix and takes it
+    against the win mask. the matrix is cut in row chunks when it would be huge.
+
+    Args:
+        is_victory (np.ndarray): bool win mask of the matches
+        resample_count (int, optional): Defaults to 2000.
+        confidence (float, optional): Defaults to 0.95.
+        rng (np.random.Generator, optional): for repeatable results.
+
+    Returns:
+        WinRateInterval in percent, nan when there is no match.
+    """
+    is_victory = np.asarray(is_victory, dtype=bool)
+    match_count = len(is_victory)
+    if match_count == 0:
+        return WinRateInterval(np.nan, np.nan)
+    rng = np.random.default_rng() if rng is None else rng
+
+    rates = np.empty(resample_count)
+    rows_per_chunk = max(1, MAX_MATRIX_ELEMENTS // match_count)
+    for start in range(0, resample_count, rows_per_chunk):
+        stop = min(start + rows_per_chunk, resample_count)
+        resample_index = rng.integers(0, match_count, size=(stop - start, match_count))
+        rates[start:stop] = is_victory[resample_index].mean(axis=1)
+    low, high = np.percentile(rates * 100, _percentile_bounds(confidence))
+    return WinRateInterval(round(low, 2), round(high, 2))
+
+
+def bootstrap_grouped_win_rate_intervals(count, win_count, resample_count=DEFAULT_RESAMPLE_COUNT, confidence=DEFAULT_CONFIDENCE, rng=None):
+    """percentile bootstrap interval of many win rates at once, e.g. every hero.
+
+    resampling n matches with w wins gives a Binomial(n, w / n) win count,
+    so every group is drawn in one (resample_count, group_count) array
+    without building the index matrix.
+
+    Args:
+        count (np.ndarray): matches of every group
+        win_count (np.ndarray): wins of every group
+        resample_count (int, optional): Defaults to 2000.
+        confidence (float, optional): Defaults to 0.95.
+        rng (np.random.Generator, optional): for repeatable results.
+
+    Returns:
+        WinRateInterval of arrays in percent, nan where count is 0.
+    """
+    count = np.asarray(count, dtype=np.int64)
+    win_count = np.asarray(win_count, dtype=np.int64)
+    rng = np.random.default_rng() if rng is None else rng
+
+    played = count > 0
+    probability = np.zeros(count.shape)
+    np.divide(win_count, count, out=probability, where=played)
+
+    # unplayed groups (most heroes) are skipped, the rest is drawn in chunks
+    played_index = np.flatnonzero(played)
+    played_count = count.ravel()[played_index]
+    played_probability = probability.ravel()[played_index]
+    low = np.full(count.size, np.nan)
+    high = np.full(count.size, np.nan)
+    groups_per_chunk = max(1, MAX_MATRIX_ELEMENTS // resample_count)
+    for start in range(0, len(played_index), groups_per_chunk):
+        stop = min(start + groups_per_chunk, len(played_index))
+        resampled_win = rng.binomial(played_count[start:stop], played_probability[start:stop], size=(resample_count, stop - start))
+        rates = resampled_win / played_count[start:stop] * 100
+        chunk_low, chunk_high = np.percentile(rates, _percentile_bounds(confidence), axis=0)
+        low[played_index[start:stop]] = np.round(chunk_low, 2)
+        high[played_index[start:stop]] = np.round(chunk_high, 2)
+    return WinRateInterval(low.reshape(count.shape), high.reshape(count.shape))
+
+
+def interval_straddles_threshold(interval, thresholds=WIN_RATE_VERDICT_THRESHOLDS):
+    """True when the verdict could change inside the interval.
+
+    a verdict bucket is [threshold, next threshold), so the interval straddles
+    a threshold when low < threshold <= high.
+
+    Returns:
+        bool, or bool array for grouped intervals. nan intervals are False.
+    """
+    low = np.asarray(interval.low, dtype=float)[..., None]
+    high = np.asarray(interval.high, dtype=float)[..., None]
+    thresholds = np.asarray(thresholds, dtype=float)
+    return np.any((low < thresholds) & (thresholds <= high), axis=-1)
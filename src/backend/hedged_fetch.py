@@ -0,0 +1,217 @@
+import json
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# one match schema for both providers, and a hedged request between them.
+# the schema is the OpenDota /players/{id}/matches one, so every existing report works on it.
+
+OPENDOTA_MATCH_KEYS = (
+    "match_id", "player_slot", "radiant_win", "start_time", "duration",
+    "lobby_type", "game_mode", "hero_id", "kills", "deaths", "assists", "party_size",
+)
+
+# Stratz returns enums, their order is the same as the ids in dotaconstants
+STRATZ_LOBBY_TYPES = [
+    "UNRANKED", "PRACTICE", "TOURNAMENT", "TUTORIAL", "COOP_VS_BOTS", "TEAM_MATCH",
+    "SOLO_QUEUE", "RANKED", "SOLO_MID", "BATTLE_CUP", "LOCAL_BOTS", "SPECTATOR",
+    "EVENT", "GAUNTLET", "NEW_PLAYER", "FEATURED",
+]
+STRATZ_GAME_MODES = [
+    "NONE", "ALL_PICK", "CAPTAINS_MODE", "RANDOM_DRAFT", "SINGLE_DRAFT", "ALL_RANDOM",
+    "INTRO", "THE_DIRETIDE", "REVERSE_CAPTAINS_MODE", "THE_GREEVILING", "TUTORIAL",
+    "MID_ONLY", "LEAST_PLAYED", "NEW_PLAYER_POOL", "COMPENDIUM_MATCHMAKING", "CUSTOM",
+    "CAPTAINS_DRAFT", "BALANCED_DRAFT", "ABILITY_DRAFT", "EVENT", "ALL_RANDOM_DEATH_MATCH",
+    "SOLO_MID", "ALL_PICK_RANKED", "TURBO", "MUTATION",
+]
+
+# Stratz only tells solo from party, a party match of unknown size is stored with this party_size
+STRATZ_PARTY_SIZE = 2
+
+# latency histogram buckets, log spaced from 50ms to 60s
+HISTOGRAM_MIN_SECONDS = 0.05
+HISTOGRAM_MAX_SECONDS = 60.0
+HISTOGRAM_BUCKET_COUNT = 48
+
+# below this many samples the percentile is not trusted
+MIN_SAMPLES_FOR_PERCENTILE = 20
+DEFAULT_HEDGE_DELAY_SECONDS = 2.0
+DEFAULT_HEDGE_PERCENTILE = 95
+
+
+def _enum_to_id(value, names):
+    if value is None or isinstance(value, int):
+        return value
+    try:
+        return names.index(value)
+    except ValueError:
+        return None
+
+
+def normalize_opendota_match(match):
+    """keep only the shared keys of an OpenDota match, missing ones are None."""
+    return {key: match.get(key) for key in OPENDOTA_MATCH_KEYS}
+
+
+def normalize_stratz_match(match, steam_account_id, party_size=None):
+    """turn one Stratz match into the OpenDota schema, seen from the given player.
+
+    Args:
+        match (dict): one match of the Stratz GraphQL response
+        steam_account_id (int): the tracked player
+        party_size (int, optional): Stratz does not return it, pass 1 when the
+            request was filtered with isParty false and STRATZ_PARTY_SIZE with
+            isParty true. Defaults to None (unknown).
+
+    Returns:
+        dict, None if the player is not in the match.
+    """
+    for player in match["players"]:
+        if player["steamAccountId"] == int(steam_account_id):
+            break
+    else:
+        return None
+    slot = (player.get("playerSlot") or 0) % 128 % 5
+    return {
+        "match_id": match["id"],
+        "player_slot": slot if player["isRadiant"] else 128 + slot,
+        "radiant_win": match["didRadiantWin"],
+        "start_time": match["startDateTime"],
+        "duration": match.get("durationSeconds"),
+        "lobby_type": _enum_to_id(match.get("lobbyType"), STRATZ_LOBBY_TYPES),
+        "game_mode": _enum_to_id(match.get("gameMode"), STRATZ_GAME_MODES),
+        "hero_id": player["heroId"],
+        "kills": player.get("kills"),
+        "deaths": player.get("deaths"),
+        "assists": player.get("assists"),
+        "party_size": party_size,
+    }
+
+
+class LatencyHistogram:
+    """response time histogram of one provider, log spaced buckets.
+
+    record is called from the fetch threads, so everything goes through a lock.
+    """
+
+    def __init__(self, counts=None):
+        self.edges = [
+            HISTOGRAM_MIN_SECONDS * (HISTOGRAM_MAX_SECONDS / HISTOGRAM_MIN_SECONDS) ** (i / (HISTOGRAM_BUCKET_COUNT - 1))
+            for i in range(HISTOGRAM_BUCKET_COUNT)
+        ]
+        self.counts = list(counts) if counts else [0] * HISTOGRAM_BUCKET_COUNT
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        """add one response time, anything slower than the last edge goes to the last bucket."""
+        if seconds <= HISTOGRAM_MIN_SECONDS:
+            bucket = 0
+        else:
+            ratio = math.log(seconds / HISTOGRAM_MIN_SECONDS) / math.log(HISTOGRAM_MAX_SECONDS / HISTOGRAM_MIN_SECONDS)
+            bucket = min(HISTOGRAM_BUCKET_COUNT - 1, math.ceil(ratio * (HISTOGRAM_BUCKET_COUNT - 1)))
+        with self.lock:
+            self.counts[bucket] += 1
+
+    def sample_count(self):
+        with self.lock:
+            return sum(self.counts)
+
+    def percentile(self, percentile, default=DEFAULT_HEDGE_DELAY_SECONDS):
+        """upper edge of the bucket holding the given percentile, default when there are too few samples."""
+        with self.lock:
+            counts = list(self.counts)
+        total = sum(counts)
+        if total < MIN_SAMPLES_FOR_PERCENTILE:
+            return default
+        target = total * percentile / 100
+        cumulative = 0
+        for edge, count in zip(self.edges, counts):
+            cumulative += count
+            if cumulative >= target:
+                return edge
+        return self.edges[-1]
+
+
+def load_latency_histograms(path, providers):
+    """read the saved histograms, missing providers or file give empty ones."""
+    data = {}
+    try:
+        with open(path, "r") as json_file:
+            data = json.load(json_file)
+    except (FileNotFoundError, json.JSONDecodeError):  # 文件不存在或JSON解码失败
+        pass
+    histograms = {}
+    for provider in providers:
+        counts = data.get(provider)
+        if counts is not None and len(counts) != HISTOGRAM_BUCKET_COUNT:
+            counts = None
+        histograms[provider] = LatencyHistogram(counts)
+    return histograms
+
+
+def save_latency_histograms(path, histograms):
+    data = {}
+    for provider, histogram in histograms.items():
+        with histogram.lock:
+            data[provider] = list(histogram.counts)
+    with open(path, "w") as json_file:
+        json.dump(data, json_file, indent=4)
+
+
+def hedged_fetch(fetchers, preferred, histograms, hedge_percentile=DEFAULT_HEDGE_PERCENTILE):
+    """ask the preferred provider first, hedge to the others when it is slow or fails.
+
+    the hedge delay is the preferred provider's latency percentile. the first
+    provider that answers with data wins, a provider answering None or raising
+    counts as failed. the slow request is not waited for, its latency still
+    goes into its histogram when it finishes, failed or not: timeouts are the
+    tail the hedge delay has to cover. once a winner is chosen the stop event
+    is set, a fetcher sending several requests should check it between them
+    and give up, an arm given up that way is not recorded.
+
+    Args:
+        fetchers (dict): provider name -> function taking the stop threading.Event, returns data or None
+        preferred (str): provider to ask first
+        histograms (dict): provider name -> LatencyHistogram
+        hedge_percentile (num, optional): Defaults to 95.
+
+    Returns:
+        (provider name, data), (None, None) if every provider failed.
+    """
+    order = [preferred] + [name for name in fetchers if name != preferred]
+    executor = ThreadPoolExecutor(max_workers=len(order))
+    futures = {}
+    stop = threading.Event()
+
+    def launch(name):
+        start = time.monotonic()
+        future = executor.submit(fetchers[name], stop)
+
+        def record_latency(finished):
+            failed = finished.exception() is not None or finished.result() is None
+            if not (failed and stop.is_set()):
+                histograms[name].record(time.monotonic() - start)
+
+        future.add_done_callback(record_latency)
+        futures[future] = name
+
+    try:
+        launch(order.pop(0))
+        wait(list(futures), timeout=histograms[preferred].percentile(hedge_percentile))
+        checked = set()
+        while True:
+            for future in [future for future in futures if future.done() and future not in checked]:
+                checked.add(future)
+                if future.exception() is None and future.result() is not None:
+                    return futures[future], future.result()
+            if order:
+                # preferred one is slow or failed, hedge to the next provider
+                launch(order.pop(0))
+            elif len(checked) == len(futures):
+                return None, None
+            wait([future for future in futures if not future.done()], return_when=FIRST_COMPLETED)
+    finally:
+        # a running future cannot be cancelled, the stop event ends its remaining requests
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,137 @@
+from collections import namedtuple
+
+import numpy as np
+
+# hero matchup / synergy matrices.
+# row is the hero the tracked player picked, column is the other hero.
+# everything is filled with bincount on a flattened (row, column) index,
+# so 10k matches x 10 players is just a few array operations.
+
+HeroMatrices = namedtuple(
+    "HeroMatrices",
+    ["played_count", "played_win", "ally_count", "ally_win", "enemy_count", "enemy_win"],
+)
+
+
+def hero_count_and_win(hero_id, is_victory, hero_count):
+    """count games and wins of every hero.
+
+    Args:
+        hero_id (np.ndarray): hero id of each match
+        is_victory (np.ndarray): bool win mask of each match
+        hero_count (int): length of the output, max hero id + 1
+
+    Returns:
+        count, win: int arrays indexed by hero id
+    """
+    count = np.bincount(hero_id, minlength=hero_count)
+    win = np.bincount(hero_id, weights=is_victory, minlength=hero_count).astype(np.int64)
+    return count, win
+
+
+def _scatter_pairs(row, column, is_victory, hero_count):
+    flat_index = row * hero_count + column
+    size = hero_count * hero_count
+    count = np.bincount(flat_index, minlength=size).reshape(hero_count, hero_count)
+    win = np.bincount(flat_index, weights=is_victory, minlength=size).astype(np.int64).reshape(hero_count, hero_count)
+    return count, win
+
+
+def build_hero_matrices(stratz_arrays, steam_account_id, hero_count):
+    """build the hero-with-hero (ally) and hero-vs-hero (enemy) matrices of one player.
+
+    matches where the player can not be found are skipped.
+    hero id 0 (not picked / unknown) never gets counted.
+
+    Args:
+        stratz_arrays (StratzMatchArrays): from match_arrays.build_stratz_match_arrays
+        steam_account_id (int): the tracked player
+        hero_count (int): max hero id + 1
+
+    Returns:
+        HeroMatrices. played_* is indexed by hero id,
+        ally_* and enemy_* are (hero_count, hero_count), [my hero, other hero].
+        the win count is always from the tracked player's side.
+    """
+    is_me = stratz_arrays.steam_account_id == int(steam_account_id)
+    found = is_me.any(axis=1)
+    my_column = is_me.argmax(axis=1)[found]
+    rows = np.flatnonzero(found)
+
+    hero_id = stratz_arrays.hero_id[rows]
+    is_radiant = stratz_arrays.is_radiant[rows]
+    my_hero = hero_id[np.arange(len(rows)), my_column]
+    my_radiant = is_radiant[np.arange(len(rows)), my_column]
+    my_victory = stratz_arrays.is_victory[rows, my_column]
+
+    valid = (hero_id > 0) & (my_hero > 0)[:, None]
+    same_team = is_radiant == my_radiant[:, None]
+    ally_mask = valid & same_team & ~is_me[rows]
+    enemy_mask = valid & ~same_team
+
+    my_hero_grid = np.broadcast_to(my_hero[:, None], hero_id.shape)
+    my_victory_grid = np.broadcast_to(my_victory[:, None], hero_id.shape)
+
+    played_count, played_win = hero_count_and_win(my_hero[my_hero > 0], my_victory[my_hero > 0], hero_count)
+    ally_count, ally_win = _scatter_pairs(my_hero_grid[ally_mask], hero_id[ally_mask], my_victory_grid[ally_mask], hero_count)
+    enemy_count, enemy_win = _scatter_pairs(my_hero_grid[enemy_mask], hero_id[enemy_mask], my_victory_grid[enemy_mask], hero_count)
+    return HeroMatrices(played_count, played_win, ally_count, ally_win, enemy_count, enemy_win)
+
+
+def win_rate_percent(count, win):
+    """win / count * 100 rounded to 2 digits, 0 where count is 0."""
+    rate = np.zeros(np.shape(count), dtype=float)
+    np.divide(win, count, out=rate, where=np.asarray(count) > 0)
+    return np.round(rate * 100, 2)
+
+
+def top_k_indices(values, k, mask=None):
+    """indices of the k largest values, largest first.
+
+    uses argpartition so only the candidates are sorted. ties are broken by the
+    smaller index first, the same order a stable sorted(..., reverse=True) gives.
+
+    Args:
+        values (np.ndarray): 1d values to rank
+        k (int): how many to return, may return less if not enough candidates
+        mask (np.ndarray, optional): bool, only rank where mask is True
+
+    Returns:
+        np.ndarray of indices into values
+    """
+    values = np.asarray(values)
+    candidates = np.arange(len(values)) if mask is None else np.flatnonzero(mask)
+    if k <= 0 or len(candidates) == 0:
+        return candidates[:0]
+    candidate_values = values[candidates]
+    if k < len(candidates):
+        # the k-th largest value, then keep everything that ties with it so the tie break is exact
+        kth_value = np.partition(candidate_values, len(candidates) - k)[len(candidates) - k]
+        keep = candidate_values >= kth_value
+        candidates = candidates[keep]
+        candidate_values = candidate_values[keep]
+    order = np.lexsort((candidates, -candidate_values))
+    return candidates[order[:k]]
+
+
+def top_k_pairs(count, win, k, min_count=1, by="count"):
+    """top k (my hero, other hero) cells of an ally or enemy matrix.
+
+    Args:
+        count, win (np.ndarray): (hero_count, hero_count) from build_hero_matrices
+        k (int): how many pairs
+        min_count (int, optional): ignore pairs played less than this. Defaults to 1.
+        by (str, optional): "count" or "win_rate". Defaults to "count".
+
+    Returns:
+        list of (my_hero_id, other_hero_id, count, win_rate)
+    """
+    flat_count = count.ravel()
+    flat_rate = win_rate_percent(flat_count, win.ravel())
+    values = flat_count if by == "count" else flat_rate
+    flat_index = top_k_indices(values, k, mask=flat_count >= max(min_count, 1))
+    my_hero, other_hero = np.unravel_index(flat_index, count.shape)
+    return [
+        (int(row), int(column), int(flat_count[index]), float(flat_rate[index]))
+        for row, column, index in zip(my_hero, other_hero, flat_index)
+    ]
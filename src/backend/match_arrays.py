@@ -0,0 +1,124 @@
+import json
+from collections import namedtuple
+
+import numpy as np
+
+# turn the raw match json into flat numpy arrays, so the statistics can be done
+# with bincount / scatter-add instead of looping over dicts.
+
+PLAYERS_PER_MATCH = 10
+
+OpendotaMatchArrays = namedtuple(
+    "OpendotaMatchArrays",
+    ["match_id", "start_time", "hero_id", "is_victory", "party_size", "lobby_type"],
+)
+
+StratzMatchArrays = namedtuple(
+    "StratzMatchArrays",
+    [
+        "match_id", "start_time", "duration_seconds",
+        "actual_rank", "average_rank", "average_imp",
+        "hero_id", "is_radiant", "is_victory", "steam_account_id",
+        "kills", "deaths", "assists",
+    ],
+)
+
+
+def load_hero_table(hero_json_path):
+    """read dotaconstants heroes.json once and lay it out by hero id.
+
+    Args:
+        hero_json_path (Path): ./data/dotaconstants/build/heroes.json
+
+    Returns:
+        hero_names: numpy array of localized names, index is hero id. empty string for unused ids.
+    """
+    with open(hero_json_path, "r") as file:
+        hero_data = json.load(file)
+    hero_count = max(int(key) for key in hero_data) + 1
+    hero_names = np.full(hero_count, "", dtype=object)
+    for key, value in hero_data.items():
+        hero_names[int(key)] = value["localized_name"]
+    return hero_names
+
+
+def is_match_won(match):
+    """OpenDota does not give a win flag directly, use player_slot and radiant_win."""
+    return (match["player_slot"] <= 127 and match["radiant_win"] == True) or (match["player_slot"] >= 128 and match["radiant_win"] == False)
+
+
+def build_opendota_match_arrays(matches):
+    """flatten the OpenDota matches list into arrays.
+
+    party_size None (unknown) is stored as 0, lobby_type None as -1.
+
+    Args:
+        matches (list): match data request from OpendotaAPI
+
+    Returns:
+        OpendotaMatchArrays
+    """
+    match_count = len(matches)
+    match_id = np.fromiter((match.get("match_id", 0) for match in matches), dtype=np.int64, count=match_count)
+    start_time = np.fromiter((match["start_time"] for match in matches), dtype=np.int64, count=match_count)
+    hero_id = np.fromiter((match["hero_id"] or 0 for match in matches), dtype=np.int64, count=match_count)
+    is_victory = np.fromiter((is_match_won(match) for match in matches), dtype=bool, count=match_count)
+    party_size = np.fromiter((match["party_size"] or 0 for match in matches), dtype=np.int64, count=match_count)
+    lobby_type = np.fromiter(
+        (-1 if match["lobby_type"] is None else match["lobby_type"] for match in matches), dtype=np.int64, count=match_count
+    )
+    return OpendotaMatchArrays(match_id, start_time, hero_id, is_victory, party_size, lobby_type)
+
+
+def build_stratz_match_arrays(stratz_data):
+    """flatten the Stratz GraphQL response into (match, player) arrays.
+
+    every match gets 10 player columns. missing players are padded with
+    hero id 0 and steam account id -1, anonymous players get steam account id -1 too.
+    missing rank is stored as 0, missing imp as nan.
+
+    Args:
+        stratz_data (dict): response json from get_customized_match_data_and_save_stratz_API
+
+    Returns:
+        StratzMatchArrays, per player fields are shaped (match_count, 10)
+    """
+    matches = stratz_data["data"]["player"]["matches"]
+    match_count = len(matches)
+    shape = (match_count, PLAYERS_PER_MATCH)
+
+    match_id = np.fromiter((match["id"] for match in matches), dtype=np.int64, count=match_count)
+    start_time = np.fromiter((match["startDateTime"] for match in matches), dtype=np.int64, count=match_count)
+    duration_seconds = np.fromiter((match.get("durationSeconds") or 0 for match in matches), dtype=np.int64, count=match_count)
+    actual_rank = np.fromiter((match.get("actualRank") or 0 for match in matches), dtype=np.int64, count=match_count)
+    average_rank = np.fromiter((match.get("averageRank") or 0 for match in matches), dtype=np.int64, count=match_count)
+    average_imp = np.fromiter(
+        (np.nan if match.get("averageImp") is None else match["averageImp"] for match in matches),
+        dtype=float, count=match_count,
+    )
+    hero_id = np.zeros(shape, dtype=np.int64)
+    is_radiant = np.zeros(shape, dtype=bool)
+    is_victory = np.zeros(shape, dtype=bool)
+    steam_account_id = np.full(shape, -1, dtype=np.int64)
+    kills = np.zeros(shape, dtype=np.int64)
+    deaths = np.zeros(shape, dtype=np.int64)
+    assists = np.zeros(shape, dtype=np.int64)
+
+    for row, match in enumerate(matches):
+        players = match["players"][:PLAYERS_PER_MATCH]
+        column_count = len(players)
+        hero_id[row, :column_count] = [player["heroId"] or 0 for player in players]
+        is_radiant[row, :column_count] = [bool(player["isRadiant"]) for player in players]
+        is_victory[row, :column_count] = [bool(player["isVictory"]) for player in players]
+        steam_account_id[row, :column_count] = [
+            -1 if player["steamAccountId"] is None else player["steamAccountId"] for player in players
+        ]
+        kills[row, :column_count] = [player.get("kills") or 0 for player in players]
+        deaths[row, :column_count] = [player.get("deaths") or 0 for player in players]
+        assists[row, :column_count] = [player.get("assists") or 0 for player in players]
+    return StratzMatchArrays(
+        match_id, start_time, duration_seconds,
+        actual_rank, average_rank, average_imp,
+        hero_id, is_radiant, is_victory, steam_account_id,
+        kills, deaths, assists,
+    )
@@ -0,0 +1,117 @@
+import json
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+from src.backend import hero_matrix
+
+# patch segmentation based on dotaconstants patch.json.
+# a match belongs to the last patch released before its start_time,
+# found with one searchsorted over the sorted release times.
+
+PatchIndex = namedtuple("PatchIndex", ["patch_id", "name", "release_time"])
+
+PatchStatistics = namedtuple(
+    "PatchStatistics",
+    [
+        "match_count", "win_count",
+        "solo_count", "solo_win_count",
+        "party_count", "party_win_count",
+        "hero_count", "hero_win_count",
+    ],
+)
+
+
+def load_patch_index(patch_json_path):
+    """read dotaconstants patch.json into sorted arrays.
+
+    Args:
+        patch_json_path (Path): ./data/dotaconstants/build/patch.json
+
+    Returns:
+        PatchIndex, release_time is unix seconds and sorted ascending.
+    """
+    with open(patch_json_path, "r") as file:
+        patch_data = json.load(file)
+    patch_data = sorted(patch_data, key=lambda patch: patch["date"])
+    patch_id = np.array([patch["id"] for patch in patch_data], dtype=np.int64)
+    name = np.array([patch["name"] for patch in patch_data], dtype=object)
+    release_time = np.array(
+        [int(datetime.fromisoformat(patch["date"].replace("Z", "+00:00")).timestamp()) for patch in patch_data],
+        dtype=np.int64,
+    )
+    return PatchIndex(patch_id, name, release_time)
+
+
+def map_start_time_to_patch(patch_index, start_time):
+    """map every start_time to the position of its patch in the index.
+
+    Args:
+        patch_index (PatchIndex): from load_patch_index
+        start_time (np.ndarray): unix seconds
+
+    Returns:
+        np.ndarray of positions into patch_index, -1 for matches before the first known patch.
+    """
+    return np.searchsorted(patch_index.release_time, start_time, side="right") - 1
+
+
+def current_patch_mask(patch_index, start_time):
+    """bool mask of the matches played on the latest patch of the index."""
+    return map_start_time_to_patch(patch_index, start_time) == len(patch_index.release_time) - 1
+
+
+def is_patch_index_outdated(patch_index, now, max_age_seconds):
+    """True when the latest known patch was released longer ago than max_age_seconds.
+
+    dotaconstants is a submodule, when it is not updated every match after the
+    last known release still maps to that old patch. the "current patch" filter
+    then keeps months or years of matches and labels them all with the old name.
+    """
+    if len(patch_index.release_time) == 0:
+        return True
+    return now - patch_index.release_time[-1] > max_age_seconds
+
+
+def calculate_patch_statistics(patch_index, arrays, hero_count):
+    """overall, solo/party and per hero counts of every patch in one grouped pass.
+
+    Args:
+        patch_index (PatchIndex): from load_patch_index
+        arrays (OpendotaMatchArrays): from match_arrays.build_opendota_match_arrays
+        hero_count (int): max hero id + 1
+
+    Returns:
+        PatchStatistics, every field indexed by patch position,
+        hero_* fields are (patch_count, hero_count).
+    """
+    patch_count = len(patch_index.release_time)
+    position = map_start_time_to_patch(patch_index, arrays.start_time)
+    known = position >= 0
+    position = position[known]
+    is_victory = arrays.is_victory[known]
+    party_size = arrays.party_size[known]
+    hero_id = arrays.hero_id[known]
+
+    def grouped(mask):
+        count = np.bincount(position[mask], minlength=patch_count)
+        win = np.bincount(position[mask], weights=is_victory[mask], minlength=patch_count).astype(np.int64)
+        return count, win
+
+    match_count, win_count = grouped(np.ones(len(position), dtype=bool))
+    solo_count, solo_win_count = grouped(party_size == 1)
+    party_count, party_win_count = grouped(party_size >= 2)
+
+    valid_hero = (hero_id > 0) & (hero_id < hero_count)
+    flat_index = position[valid_hero] * hero_count + hero_id[valid_hero]
+    hero_match_count, hero_win_count = hero_matrix.hero_count_and_win(
+        flat_index, is_victory[valid_hero], patch_count * hero_count
+    )
+    return PatchStatistics(
+        match_count, win_count,
+        solo_count, solo_win_count,
+        party_count, party_win_count,
+        hero_match_count.reshape(patch_count, hero_count),
+        hero_win_count.reshape(patch_count, hero_count),
+    )
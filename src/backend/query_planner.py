@@ -0,0 +1,160 @@
+import json
+import math
+import os
+from collections import namedtuple
+
+# local query planner over a per player superset cache of OpenDota matches.
+#
+# the cache keeps every match we ever got (deduplicated by match_id) and a
+# coverage per lobby filter: coverage["7"] = {"since": t0, "until": t1} means every
+# ranked match started in [t0, t1] is in the cache. coverage["-1"] is the "all"
+# filter and therefore covers every lobby type. since 0 is the whole history.
+#
+# a request (lobby_type, limit, date range, party filter) is served locally when
+# the coverage answers it, otherwise the plan only asks for the missing part:
+# the days since the last sync, and/or the next older page after what we hold.
+
+QueryPlan = namedtuple("QueryPlan", ["coverage_key", "refresh_days", "older_limit"])
+
+SECONDS_PER_DAY = 86400
+
+# smallest older page, a party or date filter may need more than limit - held
+MIN_OLDER_PAGE = 100
+
+# ask a bit more than the estimate, one more round trip costs more than some extra matches
+OLDER_PAGE_SLACK = 1.1
+
+
+def new_match_cache(account_id):
+    return {"account_id": str(account_id), "matches": [], "coverage": {}}
+
+
+def load_match_cache(path, account_id):
+    """read the cache of the player, a new one if missing or the account id changed."""
+    try:
+        with open(path, "r") as json_file:
+            cache = json.load(json_file)
+    except (FileNotFoundError, json.JSONDecodeError):  # 文件不存在或JSON解码失败
+        return new_match_cache(account_id)
+    if cache.get("account_id") != str(account_id):
+        return new_match_cache(account_id)
+    return cache
+
+
+def save_match_cache(path, cache):
+    """write a temporary file and swap it in, a crash or a reader never sees half a cache."""
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w") as json_file:
+        json.dump(cache, json_file)
+    os.replace(temporary_path, path)
+
+
+def _lobby_matches(match, lobby_type):
+    return lobby_type == -1 or match["lobby_type"] == lobby_type
+
+
+def _party_matches(match, party):
+    if party is None:
+        return True
+    if party == "solo":
+        return match["party_size"] == 1
+    return match["party_size"] is not None and match["party_size"] >= 2
+
+
+def filter_cached_matches(cache, condition, since=None):
+    """the latest `limit` cached matches that fit the condition, oldest first.
+
+    Args:
+        cache (dict): from load_match_cache
+        condition (dict): limit, lobby_type, optional start_time / end_time (unix seconds)
+            and party ("solo", "party" or None)
+        since (int, optional): ignore matches older than this. Defaults to None.
+    """
+    lobby_type = int(condition["lobby_type"])
+    start_time = condition.get("start_time")
+    end_time = condition.get("end_time")
+    party = condition.get("party")
+    lower = max(start_time or 0, since or 0)
+    selected = [
+        match for match in cache["matches"]
+        if match["start_time"] >= lower
+        and (end_time is None or match["start_time"] <= end_time)
+        and _lobby_matches(match, lobby_type)
+        and _party_matches(match, party)
+    ]
+    return selected[-int(condition["limit"]):] if int(condition["limit"]) > 0 else []
+
+
+def plan_query(cache, condition, now, max_age_seconds):
+    """work out what is missing for the condition.
+
+    Args:
+        cache (dict): from load_match_cache
+        condition (dict): see filter_cached_matches
+        now (int): unix seconds
+        max_age_seconds (num): a coverage synced longer ago than this gets refreshed
+
+    Returns:
+        None when the cache answers the condition, otherwise a QueryPlan.
+        refresh_days asks for every match of the last days, older_limit for the
+        next page after the held ones. the first request of a filter has neither
+        coverage nor offset, it is just an older page from offset 0.
+    """
+    lobby_type = int(condition["lobby_type"])
+    limit = int(condition["limit"])
+    start_time = condition.get("start_time")
+    coverage = cache["coverage"]
+
+    candidate_keys = [key for key in (str(lobby_type), "-1") if key in coverage]
+    if not candidate_keys:
+        return QueryPlan(str(lobby_type), None, max(limit, 1))
+    # the widest coverage that includes the requested lobby type
+    key = min(candidate_keys, key=lambda candidate: coverage[candidate]["since"])
+    since = coverage[key]["since"]
+    until = coverage[key]["until"]
+
+    held = len(filter_cached_matches(cache, condition, since=since))
+    enough = since == 0 or held >= limit or (start_time is not None and start_time >= since)
+    older_limit = None
+    if not enough:
+        # the wider filter holds other matches too, ask for enough of them to
+        # likely reach the limit in one page
+        density = held / max(held_count(cache, key), 1)
+        missing = limit - held
+        older_limit = max(math.ceil(missing * OLDER_PAGE_SLACK / density) if density > 0 else missing, MIN_OLDER_PAGE)
+    stale = now - until > max_age_seconds
+    # an older page is asked by offset, that is only right when nothing newer is missing
+    if not stale and older_limit is None:
+        return None
+    refresh_days = math.ceil((now - until) / SECONDS_PER_DAY) if (stale or older_limit) and now > until else None
+    return QueryPlan(key, refresh_days, older_limit)
+
+
+def held_count(cache, coverage_key):
+    """how many matches of the coverage filter we hold inside the coverage, the offset of the next older page."""
+    lobby_type = int(coverage_key)
+    since = cache["coverage"][coverage_key]["since"]
+    return sum(1 for match in cache["matches"] if match["start_time"] >= since and _lobby_matches(match, lobby_type))
+
+
+def _merge(cache, fetched):
+    by_id = {match["match_id"]: match for match in cache["matches"]}
+    for match in fetched:
+        by_id[match["match_id"]] = match
+    cache["matches"] = sorted(by_id.values(), key=lambda match: match["start_time"])
+
+
+def merge_refresh(cache, coverage_key, fetched, now):
+    """every match of the last days is in, the coverage now reaches now."""
+    _merge(cache, fetched)
+    cache["coverage"][coverage_key]["until"] = now
+
+
+def merge_older_page(cache, coverage_key, fetched, requested, now):
+    """an older page is in. a short page means the whole history is held."""
+    _merge(cache, fetched)
+    coverage = cache["coverage"].setdefault(coverage_key, {"since": now, "until": now})
+    if len(fetched) < requested:
+        coverage["since"] = 0
+    else:
+        coverage["since"] = min(coverage["since"], min(match["start_time"] for match in fetched))
@@ -0,0 +1,192 @@
+import math
+from collections import namedtuple
+
+import numpy as np
+
+# numeric time series of one player from the Stratz payload.
+# kept as typed arrays (saved as .npz under data/<player>/),
+# every derived series below is a handful of array operations.
+
+PlayerSeries = namedtuple(
+    "PlayerSeries",
+    [
+        "match_id", "start_time", "duration_seconds",
+        "actual_rank", "average_rank", "average_imp",
+        "hero_id", "is_victory", "kills", "deaths", "assists",
+    ],
+)
+
+RateByBucket = namedtuple("RateByBucket", ["count", "win_count", "win_rate"])
+
+SeriesStatistics = namedtuple(
+    "SeriesStatistics", ["weighted_imp", "kda_count", "kda_edges", "kda_percentile", "by_rank", "by_duration"]
+)
+
+# actualRank / averageRank is medal * 10 + star, 80 is immortal
+RANK_BRACKET_NAMES = ["未知", "先锋", "卫士", "中军", "统帅", "传奇", "万古流芳", "超凡入圣", "冠绝一世"]
+
+DURATION_BUCKET_EDGES_MINUTES = (0, 20, 30, 40, 50)
+
+KDA_PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def extract_player_series(stratz_arrays, steam_account_id):
+    """cut one player's columns out of the (match, player) arrays, oldest match first.
+
+    Args:
+        stratz_arrays (StratzMatchArrays): from match_arrays.build_stratz_match_arrays
+        steam_account_id (int): the tracked player
+
+    Returns:
+        PlayerSeries, every field is 1d. matches without the player are skipped.
+    """
+    is_me = stratz_arrays.steam_account_id == int(steam_account_id)
+    rows = np.flatnonzero(is_me.any(axis=1))
+    rows = rows[np.argsort(stratz_arrays.start_time[rows], kind="stable")]
+    column = is_me.argmax(axis=1)[rows]
+    return PlayerSeries(
+        stratz_arrays.match_id[rows],
+        stratz_arrays.start_time[rows],
+        stratz_arrays.duration_seconds[rows],
+        stratz_arrays.actual_rank[rows],
+        stratz_arrays.average_rank[rows],
+        stratz_arrays.average_imp[rows],
+        stratz_arrays.hero_id[rows, column],
+        stratz_arrays.is_victory[rows, column],
+        stratz_arrays.kills[rows, column],
+        stratz_arrays.deaths[rows, column],
+        stratz_arrays.assists[rows, column],
+    )
+
+
+def select_series(series, mask):
+    """the matches of the series where mask is True, every field cut the same way."""
+    return PlayerSeries(*(field[mask] for field in series))
+
+
+def save_player_series(path, series):
+    """save the series as an uncompressed .npz, one array per field."""
+    np.savez(path, **series._asdict())
+
+
+def load_player_series(path):
+    """load a series saved by save_player_series, None if the file is missing."""
+    try:
+        with np.load(path) as data:
+            return PlayerSeries(**{field: data[field] for field in PlayerSeries._fields})
+    except FileNotFoundError:
+        return None
+
+
+def exponentially_weighted_mean(values, alpha=0.1):
+    """exponentially weighted running mean, nan values are skipped.
+
+    same as pandas ewm(alpha=alpha, adjust=True, ignore_na=True).mean().
+    the recursion is unrolled block by block: inside a block it is a cumsum of
+    values scaled by decay ** -i, the block size is picked so that never overflows.
+
+    Args:
+        values (np.ndarray): 1d, oldest first
+        alpha (float, optional): smoothing factor in (0, 1). Defaults to 0.1.
+
+    Returns:
+        np.ndarray, nan until the first valid value.
+    """
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    # ignore_na: a nan does not decay the weights, so run on the valid values
+    # only and hold the last mean over the nan positions
+    compact = values[valid]
+    decay = 1.0 - alpha
+    block = max(1, min(int(600 / -math.log(decay)), len(compact)))
+
+    compact_result = np.empty(len(compact))
+    carry_sum = 0.0
+    carry_weight = 0.0
+    for start in range(0, len(compact), block):
+        stop = min(start + block, len(compact))
+        step = np.arange(stop - start)
+        scale = decay ** -step
+        growth = decay ** (step + 1)
+        weighted_sum = growth * carry_sum + decay ** step * np.cumsum(compact[start:stop] * scale)
+        total_weight = growth * carry_weight + decay ** step * np.cumsum(scale)
+        compact_result[start:stop] = weighted_sum / total_weight
+        carry_sum = weighted_sum[-1]
+        carry_weight = total_weight[-1]
+
+    result = np.full(len(values), np.nan)
+    last_valid = np.cumsum(valid) - 1
+    seen = last_valid >= 0
+    result[seen] = compact_result[last_valid[seen]]
+    return result
+
+
+def kda_ratio(series):
+    """(kills + assists) / max(deaths, 1) of every match."""
+    return (series.kills + series.assists) / np.maximum(series.deaths, 1)
+
+
+def kda_distribution(kda, bin_count=10):
+    """histogram of the kda ratio.
+
+    Returns:
+        count, edges like np.histogram.
+    """
+    if len(kda) == 0:
+        return np.zeros(bin_count, dtype=np.int64), np.zeros(bin_count + 1)
+    return np.histogram(kda, bins=bin_count)
+
+
+def kda_percentiles(kda, percentiles=KDA_PERCENTILES):
+    """percentiles of the kda ratio, nan when there is no match."""
+    if len(kda) == 0:
+        return np.full(len(percentiles), np.nan)
+    return np.percentile(kda, percentiles)
+
+
+def _rate_by_bucket(bucket, is_victory, bucket_count):
+    count = np.bincount(bucket, minlength=bucket_count)
+    win_count = np.bincount(bucket, weights=is_victory, minlength=bucket_count).astype(np.int64)
+    win_rate = np.zeros(bucket_count)
+    np.divide(win_count, count, out=win_rate, where=count > 0)
+    return RateByBucket(count, win_count, np.round(win_rate * 100, 2))
+
+
+def rank_bracket_win_rate(series, use_average_rank=False):
+    """win rate by medal (先锋 ... 冠绝一世), index 0 is unknown rank.
+
+    Args:
+        series (PlayerSeries): from extract_player_series
+        use_average_rank (bool, optional): bucket by the match average rank
+            instead of actualRank. both are match level fields of
+            Stratz, not the medal of the player. Defaults to False.
+    """
+    rank = series.average_rank if use_average_rank else series.actual_rank
+    bracket = np.clip(rank // 10, 0, len(RANK_BRACKET_NAMES) - 1)
+    return _rate_by_bucket(bracket, series.is_victory, len(RANK_BRACKET_NAMES))
+
+
+def duration_bucket_win_rate(series, edges_minutes=DURATION_BUCKET_EDGES_MINUTES):
+    """win rate by match duration, bucket i is [edges[i], edges[i + 1]) minutes, the last one is open."""
+    bucket = np.digitize(series.duration_seconds / 60, edges_minutes[1:])
+    return _rate_by_bucket(bucket, series.is_victory, len(edges_minutes))
+
+
+def calculate_series_statistics(series, imp_alpha=0.1):
+    """every derived series of the player at once.
+
+    Returns:
+        SeriesStatistics: exponentially weighted IMP (one value per match),
+        KDA histogram (count, edges like np.histogram) and percentiles,
+        RateByBucket by rank bracket and by duration.
+    """
+    kda = kda_ratio(series)
+    kda_count, kda_edges = kda_distribution(kda)
+    return SeriesStatistics(
+        exponentially_weighted_mean(series.average_imp, imp_alpha),
+        kda_count,
+        kda_edges,
+        kda_percentiles(kda),
+        rank_bracket_win_rate(series),
+        duration_bucket_win_rate(series),
+    )